@@ -5,14 +5,21 @@ Word Search Puzzle Generator (Fixed Verification)
 - Reliable puzzle generation
 """
 
+import orjson
 import requests
 import random
 import json
-import time
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # ------------------------------------------------------------
 # Configuration
 # ------------------------------------------------------------
@@ -22,8 +29,9 @@ GRID_SIZES = [8, 10, 12, 15]
 DIFFICULTIES = ["easy", "medium", "hard"]
 PUZZLES_PER_COMBO = 3500
 OUTPUT_DIR = Path("data")
+FETCH_WORKERS = 8
 
-ALL_DIRECTIONS = [
+ALL_DIRECTIONS = (
     (0, 1),  # Right
     (1, 0),  # Down
     (1, 1),  # Down-Right
@@ -32,11 +40,23 @@ ALL_DIRECTIONS = [
     (-1, 0),  # Up
     (-1, -1),  # Up-Left
     (1, -1)  # Down-Left
-]
+)
+
+# Solution direction index for each direction
+DIR_INDEX = {d: i for i, d in enumerate(ALL_DIRECTIONS)}
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 
+# Shared HTTP session: keeps connections alive across theme fetches and
+# retries with backoff when the API is rate limiting or briefly down
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+    pool_connections=FETCH_WORKERS,
+    pool_maxsize=FETCH_WORKERS
+))
+
 
 # ------------------------------------------------------------
 # Load themes
@@ -87,7 +107,7 @@ def fetch_theme_words(theme: str) -> List[str]:
     """Fetch words related to a theme from Datamuse API."""
     try:
         url = f"https://api.datamuse.com/words?rel_trg={theme}&max=100"
-        response = requests.get(url, timeout=10)
+        response = _SESSION.get(url, timeout=10)
         response.raise_for_status()
         words = [item['word'].upper() for item in response.json()
                  if 'word' in item and item['word'].isalpha()]
@@ -114,18 +134,17 @@ def update_theme_cache(themes: List[str]) -> Dict[str, List[str]]:
         return cache
 
     # Otherwise fetch missing themes
-    logging.info(f"Fetching words for {len(themes)} themes")
+    missing = [theme for theme in themes
+               if theme not in cache or len(cache.get(theme, [])) < 20]
+    logging.info(f"Fetching words for {len(missing)} themes")
 
-    for theme in themes:
-        if theme not in cache or len(cache.get(theme, [])) < 20:
-            words = fetch_theme_words(theme)
+    # Fetch concurrently; the small pool bounds the load on the API
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        for theme, words in zip(missing, executor.map(fetch_theme_words, missing)):
             if words:
                 cache[theme] = words
                 logging.debug(f"Cached {len(words)} words for '{theme}'")
 
-            # Respect API rate limits
-            time.sleep(0.3)
-
     save_theme_cache(cache)
     return cache
 
@@ -163,7 +182,7 @@ def get_difficulty_params(difficulty: str, grid_size: int) -> Dict:
     if difficulty == "easy":
         return {
             'difficulty_label': 'easy',
-            'directions': [(0, 1), (1, 0)],  # Only Right and Down
+            'directions': ((0, 1), (1, 0)),  # Only Right and Down
             'backwards_ratio': 0.00,
             'word_count': max(4, min(6, grid_size // 2)),
             'min_len': 4,
@@ -175,7 +194,7 @@ def get_difficulty_params(difficulty: str, grid_size: int) -> Dict:
     elif difficulty == "medium":
         return {
             'difficulty_label': 'medium',
-            'directions': [(0, 1), (1, 0), (1, 1), (-1, 1)],  # 4 directions
+            'directions': ((0, 1), (1, 0), (1, 1), (-1, 1)),  # 4 directions
             'backwards_ratio': 0.15,
             'word_count': max(5, min(8, grid_size // 2 + 1)),
             'min_len': 4,
@@ -197,74 +216,150 @@ def get_difficulty_params(difficulty: str, grid_size: int) -> Dict:
         }
 
 
+# Parameters for every (size, difficulty), built once
+PARAMS = {(size, diff): get_difficulty_params(diff, size)
+          for size in GRID_SIZES for diff in DIFFICULTIES}
+
+
 # ------------------------------------------------------------
 # Word Filtering
 # ------------------------------------------------------------
-def filter_words(words: List[str], min_len: int, max_len: int) -> List[str]:
-    """Filter words by length."""
+def filter_words(words: List[str], min_len: int, max_len: int) -> Tuple[str, ...]:
+    """Filter words by length, returning a deduplicated tuple."""
     filtered = []
     seen = set()
 
     for w in words:
+        # Grid cells only encode A-Z, so reject non-ASCII words outright
+        # (upper() can also lengthen them, e.g. 'straße' -> 'STRASSE')
+        if not w.isascii():
+            continue
+
+        # ASCII upper() keeps the length, so reject on it first
+        if not min_len <= len(w) <= max_len:
+            continue
+
         w_upper = w.upper()
-        if (min_len <= len(w_upper) <= max_len and
-                w_upper.isalpha() and
-                w_upper not in seen):
+        if w_upper.isalpha() and w_upper not in seen:
             seen.add(w_upper)
             filtered.append(w_upper)
 
-    return filtered
+    return tuple(filtered)
 
 
 # ------------------------------------------------------------
 # Placement Helpers
 # ------------------------------------------------------------
-def can_place_word(grid: List[List[str]], word: str, r: int, c: int,
-                   dy: int, dx: int, size: int) -> bool:
-    """Check if a word can be placed at the given position."""
-    # Check bounds
-    end_r = r + (len(word) - 1) * dy
-    end_c = c + (len(word) - 1) * dx
-    if not (0 <= end_r < size and 0 <= end_c < size):
+# Byte tables for filling empty cells: random byte -> letter value (1..26),
+# and grid cell -> 0xFF if empty, 0x00 if it holds a letter. Bytes 234-255
+# map to 0 (left empty and redrawn), so each letter is equally likely
+FILL_LETTERS = bytes(b % 26 + 1 if b < 234 else 0 for b in range(256))
+EMPTY_MASK = bytes([0xFF]) + bytes(255)
+
+# Byte table for flattening the grid: letter value -> ASCII 'A'..'Z', anything else -> '?'
+GRID_ASCII = bytes(64 + b if 1 <= b <= 26 else ord('?') for b in range(256))
+
+
+def encode_word(word: str) -> bytes:
+    """Encode an uppercase word as grid cell values (A=1 .. Z=26)."""
+    return bytes(ord(ch) - 64 for ch in word)
+
+
+@lru_cache(maxsize=None)
+def placement_ranges(length: int, size: int,
+                     directions: Tuple[Tuple[int, int], ...]) -> Dict[Tuple[int, int], Tuple[int, int, int, int]]:
+    """
+    Get the valid start rectangle (r_lo, r_hi, c_lo, c_hi) per direction
+    for a word of the given length, so every start inside it fits the grid.
+    Cached per grid size and direction set; the returned dict is shared, don't modify it.
+    """
+    def axis_range(d: int) -> Tuple[int, int]:
+        if d == 1:
+            return 0, size - length
+        if d == -1:
+            return length - 1, size - 1
+        return 0, size - 1
+
+    return {(dy, dx): axis_range(dy) + axis_range(dx) for dy, dx in directions}
+
+
+def try_place(grid: bytearray, size: int, word_bytes: bytes, r: int, c: int,
+              dy: int, dx: int) -> bool:
+    """
+    Place a word at the given position if no cell conflicts.
+    The grid is left untouched when it doesn't fit. The start must come
+    from placement_ranges, so bounds are not rechecked.
+    """
+    step = dy * size + dx
+    start = r * size + c
+
+    # Crossings make the middle cell the likeliest conflict, so probe it
+    # before copying out the whole word's cells
+    mid = len(word_bytes) // 2
+    v = grid[start + mid * step]
+    if v and v != word_bytes[mid]:
         return False
 
-    # Check each cell
-    for i, ch in enumerate(word):
-        rr = r + i * dy
-        cc = c + i * dx
-        if grid[rr][cc] not in ('', ch):
+    # The word's cells are one strided slice of the flat grid
+    stop = start + len(word_bytes) * step
+    cells = slice(start, stop if stop >= 0 else None, step)
+
+    # Check each cell (0 means empty)
+    for v, ch in zip(grid[cells], word_bytes):
+        if v and v != ch:
             return False
 
+    grid[cells] = word_bytes
     return True
 
 
-def place_word(grid: List[List[str]], word: str, r: int, c: int, dy: int, dx: int) -> None:
-    """Place a word on the grid."""
-    for i, ch in enumerate(word):
-        grid[r + i * dy][c + i * dx] = ch
+def brute_force_place(grid: bytearray, size: int, word_bytes: bytes,
+                      directions: Tuple[Tuple[int, int], ...],
+                      ranges: Dict[Tuple[int, int], Tuple[int, int, int, int]]
+                      ) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Place a word at the first start that fits, scanning from the top-left.
+    Returns (r, c, dy, dx), or None if it fits nowhere.
+    """
+    for r in range(size):
+        for c in range(size):
+            for dy, dx in directions:
+                r_lo, r_hi, c_lo, c_hi = ranges[(dy, dx)]
+                if not (r_lo <= r <= r_hi and c_lo <= c <= c_hi):
+                    continue
+                if try_place(grid, size, word_bytes, r, c, dy, dx):
+                    return r, c, dy, dx
+
+    return None
 
 
 # ------------------------------------------------------------
 # FIXED Puzzle Generator
 # ------------------------------------------------------------
 def generate_puzzle(theme: str, size: int, params: Dict,
-                    available_words: List[str], puzzle_id: str) -> Optional[Dict]:
-    """Generate a single word search puzzle with fixed verification."""
-
-    # Initialize empty grid
-    grid = [['' for _ in range(size)] for _ in range(size)]
+                    available_words: Tuple[str, ...], puzzle_id: str,
+                    rng: Optional[random.Random] = None) -> Optional[Dict]:
+    """
+    Generate a single word search puzzle with fixed verification.
+    available_words must already be filtered for params with filter_words.
+    Seeds its own RNG from puzzle_id unless one is given, so output is reproducible.
+    """
+    if rng is None:
+        rng = random.Random(puzzle_id)
+    rand = rng.random
+    randrange = rng.randrange
+    choice = rng.choice
+
+    # Initialize empty grid, one byte per cell in row-major order
+    grid = bytearray(size * size)
     directions = params['directions']
 
-    # Filter words
-    filtered = filter_words(available_words, params['min_len'], params['max_len'])
-
-    if len(filtered) < params['word_count']:
+    if len(available_words) < params['word_count']:
         logging.debug(f"Not enough filtered words for {puzzle_id}")
         return None
 
     # Select words
-    random.shuffle(filtered)
-    selected_words = filtered[:params['word_count']]
+    selected_words = rng.sample(available_words, params['word_count'])
 
     # Check for obvious duplicates
     if has_similar_words(selected_words):
@@ -285,65 +380,52 @@ def generate_puzzle(theme: str, size: int, params: Dict,
         original_word = word
 
         # Decide if we should reverse this word
-        if random.random() < params['backwards_ratio']:
+        if rand() < params['backwards_ratio']:
             word = word[::-1]
 
-        placed = False
+        word_bytes = encode_word(word)
+        placement = None
+
+        # Valid start positions per direction for this word length
+        ranges = placement_ranges(len(word), size, directions)
 
         # Try to place the word
         for _ in range(params['placement_attempts']):
             # Choose random direction
-            dy, dx = random.choice(directions)
+            dy, dx = choice(directions)
 
             # Choose random starting position that fits
-            max_r = size - len(word) if dy >= 0 else size - 1
-            max_c = size - len(word) if dx >= 0 else size - 1
-            min_r = 0 if dy >= 0 else len(word) - 1
-            min_c = 0 if dx >= 0 else len(word) - 1
-
-            if max_r < min_r or max_c < min_c:
+            r_lo, r_hi, c_lo, c_hi = ranges[(dy, dx)]
+            if r_hi < r_lo or c_hi < c_lo:
                 continue
 
-            r = random.randint(min_r, max_r)
-            c = random.randint(min_c, max_c)
+            r = randrange(r_lo, r_hi + 1)
+            c = randrange(c_lo, c_hi + 1)
 
             # Skip positions that might overlap too much
-            if (r, c) in used_positions and random.random() > 0.7:
+            if (r, c) in used_positions and rand() > 0.7:
                 continue
 
-            if can_place_word(grid, word, r, c, dy, dx, size):
-                place_word(grid, word, r, c, dy, dx)
+            if try_place(grid, size, word_bytes, r, c, dy, dx):
+                placement = (r, c, dy, dx)
+                break
 
-                # Record solution
-                pos = r * size + c
-                dir_idx = ALL_DIRECTIONS.index((dy, dx))
-                solution.append(f"{pos};{dir_idx};{len(original_word)};{original_word}")
-                placed_words.append(original_word)
+        if placement is None:
+            # Try brute force placement
+            placement = brute_force_place(grid, size, word_bytes, directions, ranges)
+            if placement is None:
+                continue
 
-                # Mark this position as used
-                used_positions.add((r, c))
+        r, c, dy, dx = placement
 
-                placed = True
-                break
+        # Record solution
+        pos = r * size + c
+        dir_idx = DIR_INDEX[(dy, dx)]
+        solution.append(f"{pos};{dir_idx};{len(original_word)};{original_word}")
+        placed_words.append(original_word)
 
-        if not placed:
-            # Try brute force placement
-            for r in range(size):
-                for c in range(size):
-                    for dy, dx in directions:
-                        if can_place_word(grid, word, r, c, dy, dx, size):
-                            place_word(grid, word, r, c, dy, dx)
-                            pos = r * size + c
-                            dir_idx = ALL_DIRECTIONS.index((dy, dx))
-                            solution.append(f"{pos};{dir_idx};{len(original_word)};{original_word}")
-                            placed_words.append(original_word)
-                            used_positions.add((r, c))
-                            placed = True
-                            break
-                    if placed:
-                        break
-                if placed:
-                    break
+        # Mark this position as used
+        used_positions.add((r, c))
 
     # Check if we placed enough words
     if len(placed_words) < params['min_words_required']:
@@ -355,33 +437,28 @@ def generate_puzzle(theme: str, size: int, params: Dict,
         logging.debug(f"Intermediate solution verification failed for {puzzle_id}")
         return None
 
-    # Fill empty cells with random letters
-    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-    for r in range(size):
-        for c in range(size):
-            if not grid[r][c]:
-                grid[r][c] = random.choice(letters)
+    # Fill empty cells with random letters, merging the whole grid at once
+    # as big integers instead of looping over cells; cells that drew a
+    # rejected byte stay empty for the next round
+    n_cells = size * size
+    while 0 in grid:
+        letters = int.from_bytes(rng.randbytes(n_cells).translate(FILL_LETTERS), 'big')
+        empty = int.from_bytes(grid.translate(EMPTY_MASK), 'big')
+        grid[:] = (int.from_bytes(grid, 'big') | (letters & empty)).to_bytes(n_cells, 'big')
 
     # FIXED: Final verification with filled grid
     if not verify_solution_final(grid, solution, size):
         logging.debug(f"Final solution verification failed for {puzzle_id}")
         return None
 
-    # Remove duplicates from placed_words
-    unique_words = []
-    seen_words = set()
-    for w in placed_words:
-        if w not in seen_words:
-            seen_words.add(w)
-            unique_words.append(w)
-
-    # Final check for similar words
-    if has_similar_words(unique_words):
+    # Final check for similar words (placed_words needs no dedupe: it is
+    # sampled without replacement from filter_words' deduplicated tuple)
+    if has_similar_words(placed_words):
         logging.debug(f"Similar words in final puzzle {puzzle_id}")
         return None
 
     # Flatten grid to string
-    flat_grid = ''.join(''.join(row) for row in grid)
+    flat_grid = grid.translate(GRID_ASCII).decode('ascii')
 
     return {
         'id': puzzle_id,
@@ -390,12 +467,12 @@ def generate_puzzle(theme: str, size: int, params: Dict,
         'solution': ','.join(solution),
         'gridSize': size,
         'difficulty': params['difficulty_label'],
-        'wordCount': len(unique_words),
-        'wordlist': sorted(unique_words, key=lambda w: (len(w), w.lower()))
+        'wordCount': len(placed_words),
+        'wordlist': sorted(placed_words, key=lambda w: (len(w), w.lower()))
     }
 
 
-def verify_solution_intermediate(grid: List[List[str]], solution: List[str], size: int) -> bool:
+def verify_solution_intermediate(grid: bytearray, solution: List[str], size: int) -> bool:
     """Verify solution on intermediate grid (before filling with random letters)."""
     try:
         for sol in solution:
@@ -443,10 +520,12 @@ def verify_solution_intermediate(grid: List[List[str]], solution: List[str], siz
             for i in range(word_length):
                 r = start_row + i * dy
                 c = start_col + i * dx
-                if grid[r][c] != original_word[i]:
+                cell = grid[r * size + c]
+                if cell != ord(original_word[i]) - 64:
                     # Check if it's the reversed version
-                    if grid[r][c] != original_word[word_length - 1 - i]:
-                        logging.debug(f"Letter mismatch at ({r},{c}): {grid[r][c]} != {original_word[i]}")
+                    if cell != ord(original_word[word_length - 1 - i]) - 64:
+                        letter = chr(64 + cell) if cell else ''
+                        logging.debug(f"Letter mismatch at ({r},{c}): {letter} != {original_word[i]}")
                         return False
 
         return True
@@ -455,7 +534,7 @@ def verify_solution_intermediate(grid: List[List[str]], solution: List[str], siz
         return False
 
 
-def verify_solution_final(grid: List[List[str]], solution: List[str], size: int) -> bool:
+def verify_solution_final(grid: bytearray, solution: List[str], size: int) -> bool:
     """Verify solution on final grid (after filling with random letters)."""
     try:
         for sol in solution:
@@ -490,7 +569,7 @@ def verify_solution_final(grid: List[List[str]], solution: List[str], size: int)
             for i in range(word_length):
                 r = start_row + i * dy
                 c = start_col + i * dx
-                reconstructed += grid[r][c]
+                reconstructed += chr(64 + grid[r * size + c])
 
             # Check if it matches original word or its reverse
             if reconstructed != original_word and reconstructed != original_word[::-1]:
@@ -503,6 +582,86 @@ def verify_solution_final(grid: List[List[str]], solution: List[str], size: int)
         return False
 
 
+# ------------------------------------------------------------
+# Parallel Generation
+# ------------------------------------------------------------
+MAX_ATTEMPTS_PER_PUZZLE = 300
+# Give up on a size/difficulty combo after this many failed puzzles in a row
+MAX_FAILED_PUZZLES = 3
+
+# Themes with enough words per (size, difficulty), set in each worker
+_worker_themes: Dict[Tuple[int, str], List[Tuple[str, Tuple[str, ...]]]] = {}
+# Per-combo flags shared with the parent, set once a combo is abandoned
+_worker_abandoned = None
+_worker_combo_index: Dict[Tuple[int, str], int] = {}
+
+
+def _init_worker(available_themes: Dict[Tuple[int, str], List[Tuple[str, Tuple[str, ...]]]],
+                 abandoned) -> None:
+    """Share the usable themes and abandoned-combo flags with a worker process once."""
+    global _worker_themes, _worker_abandoned, _worker_combo_index
+    _worker_themes = available_themes
+    _worker_abandoned = abandoned
+    _worker_combo_index = {combo: i for i, combo in enumerate(available_themes)}
+
+
+def _generate_and_write(task: Tuple[int, str, int]) -> Tuple[int, str, int, int, bool]:
+    """
+    Generate and save puzzle number file_id for a size/difficulty combo.
+    Returns (size, difficulty, file_id, attempts, saved); attempts is 0
+    when the combo was abandoned and the puzzle skipped.
+    """
+    size, diff, file_id = task
+    if _worker_abandoned[_worker_combo_index[(size, diff)]]:
+        return size, diff, file_id, 0, False
+
+    params = PARAMS[(size, diff)]
+    themes = _worker_themes[(size, diff)]
+    puzzle_id = f"{size}-{diff}-{file_id}"
+
+    for attempt in range(MAX_ATTEMPTS_PER_PUZZLE):
+        # Seed per puzzle and attempt so workers don't share RNG state
+        rng = random.Random(f"{puzzle_id}-{attempt}")
+
+        # Round-robin themes, moving on to the next one after a failure
+        theme, usable_words = themes[(file_id + attempt) % len(themes)]
+
+        try:
+            puzzle = generate_puzzle(theme, size, params, usable_words, puzzle_id, rng)
+        except Exception as e:
+            logging.error(f"Error generating puzzle {puzzle_id}: {e}")
+            continue
+
+        if not puzzle:
+            continue
+
+        # Quick validation
+        if len(puzzle['grid']) != size * size:
+            continue
+
+        # Every cell must be A-Z; '?' marks a value GRID_ASCII couldn't map
+        if not (puzzle['grid'].isascii() and puzzle['grid'].isalpha()):
+            logging.error(f"Non A-Z cells in grid for puzzle {puzzle_id}")
+            continue
+
+        if has_similar_words(puzzle['wordlist']):
+            continue
+
+        # Save puzzle; clients fetch each puzzle as its own file, so encode
+        # it in one call (orjson output is already compact) and write it once.
+        # Write to a temp file and rename it into place, so an interrupted
+        # run never leaves a partial puzzle that a rerun would count as done
+        folder = OUTPUT_DIR / str(size) / diff
+        tmp_file = folder / f".{file_id}.json.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(puzzle))
+        os.replace(tmp_file, folder / f"{file_id}.json")
+
+        return size, diff, file_id, attempt + 1, True
+
+    return size, diff, file_id, MAX_ATTEMPTS_PER_PUZZLE, False
+
+
 # ------------------------------------------------------------
 # Main
 # ------------------------------------------------------------
@@ -517,20 +676,25 @@ def main():
     # Create output directory
     OUTPUT_DIR.mkdir(exist_ok=True)
 
-    # Generate puzzles for each grid size and difficulty
+    # Collect the puzzles to generate for each grid size and difficulty
+    available = {}
+    targets = {}
+    tasks = []
     for size in GRID_SIZES:
         for diff in DIFFICULTIES:
             folder = OUTPUT_DIR / str(size) / diff
             folder.mkdir(parents=True, exist_ok=True)
 
-            params = get_difficulty_params(diff, size)
-            file_counter = 1  # This tracks the NEXT file number to use
-            puzzles_made = 0
-            failed_attempts = 0
-            max_failed_attempts = 300
-            total_attempts = 0  # Track total attempts for rate calculation
+            # Skip puzzles that already exist, so reruns resume where they stopped;
+            # empty files (e.g. from runs before writes were atomic) are redone
+            existing = {p.name for p in folder.glob("*.json") if p.stat().st_size > 0}
+            missing_ids = [file_id for file_id in range(1, PUZZLES_PER_COMBO + 1)
+                           if f"{file_id}.json" not in existing]
+            if not missing_ids:
+                logging.info(f"All {PUZZLES_PER_COMBO} puzzles exist for {size}-{diff}, skipping")
+                continue
 
-            logging.info(f"Generating {PUZZLES_PER_COMBO} puzzles for size={size}, difficulty={diff}")
+            params = PARAMS[(size, diff)]
 
             # Find themes with enough words
             available_themes = []
@@ -549,65 +713,57 @@ def main():
 
             logging.info(f"Found {len(available_themes)} themes for {size}-{diff}")
 
-            while puzzles_made < PUZZLES_PER_COMBO and failed_attempts < max_failed_attempts:
-                # Randomly select a theme
-                theme, usable_words = random.choice(available_themes)
-
-                # Generate puzzle - use a temporary ID for logging
-                puzzle_id = f"{size}-{diff}-attempt-{total_attempts}"
-
-                try:
-                    puzzle = generate_puzzle(theme, size, params, usable_words, puzzle_id)
-
-                    if not puzzle:
-                        failed_attempts += 1
-                        total_attempts += 1
-
-                        if failed_attempts % 50 == 0:
-                            logging.warning(f"{failed_attempts} failed attempts for {size}-{diff}")
-                        continue
+            available[(size, diff)] = available_themes
+            targets[(size, diff)] = len(missing_ids)
+            tasks.extend((size, diff, file_id) for file_id in missing_ids)
 
-                    # Reset failed attempts on success
-                    failed_attempts = 0
+    if not tasks:
+        logging.info("Nothing to generate!")
+        return
 
-                    # Quick validation
-                    if len(puzzle['grid']) != size * size:
-                        total_attempts += 1
-                        continue
+    workers = os.cpu_count() or 1
+    logging.info(f"Generating {len(tasks)} puzzles with {workers} worker processes")
 
-                    if has_similar_words(puzzle['wordlist']):
-                        total_attempts += 1
-                        continue
+    puzzles_made = {combo: 0 for combo in available}
+    total_attempts = {combo: 0 for combo in available}
+    failed_puzzles = {combo: 0 for combo in available}
+    failed_in_a_row = {combo: 0 for combo in available}
 
-                    # Update puzzle ID with the actual file number
-                    puzzle['id'] = f"{size}-{diff}-{file_counter}"
+    # Abandoned combos are flagged here so workers skip their queued puzzles
+    combo_index = {combo: i for i, combo in enumerate(available)}
+    abandoned = multiprocessing.RawArray('b', len(available))
 
-                    # Save puzzle
-                    output_file = folder / f"{file_counter}.json"
-                    with open(output_file, 'w') as f:
-                        json.dump(puzzle, f, separators=(',', ':'))
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(available, abandoned)) as pool:
+        for size, diff, file_id, attempts, saved in pool.imap_unordered(_generate_and_write, tasks,
+                                                                        chunksize=64):
+            combo = (size, diff)
+            total_attempts[combo] += attempts
 
-                    puzzles_made += 1
-                    file_counter += 1  # Only increment when we save a file
-                    total_attempts += 1
-
-                    if puzzles_made % 100 == 0:
-                        success_rate = puzzles_made / total_attempts if total_attempts > 0 else 0
-                        logging.info(f"  Generated {puzzles_made}/{PUZZLES_PER_COMBO} puzzles")
-                        logging.info(f"  Success rate: {success_rate:.1%}")
-
-                except Exception as e:
-                    logging.error(f"Error generating puzzle {puzzle_id}: {e}")
-                    failed_attempts += 1
-                    total_attempts += 1
+            if not saved:
+                failed_puzzles[combo] += 1
+                if attempts == 0 or abandoned[combo_index[combo]]:
                     continue
 
-            if failed_attempts >= max_failed_attempts:
-                logging.error(f"Too many failed attempts for {size}-{diff}, generated {puzzles_made} puzzles")
-            else:
-                success_rate = puzzles_made / total_attempts if total_attempts > 0 else 0
-                logging.info(f"Completed: size={size}, difficulty={diff} - {puzzles_made} puzzles")
-                logging.info(f"  Success rate: {success_rate:.1%}")
+                logging.warning(f"Too many failed attempts for puzzle {size}-{diff}-{file_id}")
+                failed_in_a_row[combo] += 1
+                if failed_in_a_row[combo] >= MAX_FAILED_PUZZLES:
+                    abandoned[combo_index[combo]] = 1
+                    logging.error(f"{failed_in_a_row[combo]} failed puzzles in a row for {size}-{diff}, giving up")
+                continue
+
+            failed_in_a_row[combo] = 0
+            puzzles_made[combo] += 1
+            if puzzles_made[combo] % 100 == 0:
+                logging.info(f"  Generated {puzzles_made[combo]}/{targets[combo]} puzzles for {size}-{diff}")
+
+    for (size, diff), made in puzzles_made.items():
+        success_rate = made / total_attempts[(size, diff)] if total_attempts[(size, diff)] > 0 else 0
+        if failed_puzzles[(size, diff)]:
+            logging.error(f"Missing {failed_puzzles[(size, diff)]} puzzles for {size}-{diff}, generated {made} puzzles")
+        else:
+            logging.info(f"Completed: size={size}, difficulty={diff} - {made} puzzles")
+        logging.info(f"  Success rate: {success_rate:.1%}")
 
     logging.info("Generation complete!")
 